@@ -1,380 +1,605 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
-import edge_tts
-import asyncio
-from pydantic import BaseModel, Field
-import uvicorn
-import logging
-from typing import Optional
-
-# 配置详细日志
-from starlette.responses import HTMLResponse
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger("TTS-Server")
-
-app = FastAPI()
-
-
-# OpenAI兼容请求模型
-class TTSParameters(BaseModel):
-    model: str = "tts-1"
-    input: str
-    voice: str = "alloy"
-    response_format: Optional[str] = "mp3"
-    speed: Optional[float] = Field(1.0, ge=0.5, le=2.0)
-    volume: Optional[float] = Field(1.0, ge=0.5, le=3.0)  # 新增音量参数
-
-
-# 模型到语音配置的映射
-MODEL_CONFIG = {
-    "tts-1": {
-        "quality": "standard",
-        "allowed_formats": ["mp3"],
-        "voice_map": {
-            "alloy": "en-US-GuyNeural",
-            "echo": "en-US-JennyNeural",
-            "nova": "zh-CN-YunxiNeural"
-        }
-    },
-    "tts-1-hd": {
-        "quality": "enhanced",
-        "allowed_formats": ["mp3"],
-        "voice_map": {
-            "alloy": "en-US-AriaNeural",
-            "echo": "en-US-DavisNeural",
-            "nova": "zh-CN-YunjianNeural"
-        }
-    }
-}
-
-
-async def write_audio(communicate, stdin):
-    """将edge_tts的音频数据写入ffmpeg的stdin"""
-    try:
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio" and stdin is not None:
-                stdin.write(chunk["data"])
-                await stdin.drain()
-        if stdin is not None:
-            stdin.close()
-            await stdin.wait_closed()
-    except Exception as e:
-        logger.error(f"写入音频失败: {e}")
-
-
-async def read_audio(stdout):
-    """从ffmpeg的stdout读取处理后的音频数据"""
-    while True:
-        chunk = await stdout.read(4096)
-        if not chunk:
-            break
-        yield chunk
-
-
-async def generate_edge_audio(text: str, config: dict, voice: str, speed: float, volume: float):
-    """根据配置生成音频流"""
-
-    try:
-        # 获取真实语音名称
-        real_voice = config["voice_map"].get(voice.lower(), voice)
-
-        # 验证语音有效性
-        all_voices = await edge_tts.list_voices()
-        if not any(v["ShortName"] == real_voice for v in all_voices):
-            raise ValueError(f"无效语音: {real_voice}")
-
-        # 根据质量配置调整参数
-        rate = "+0%"
-        if config["quality"] == "enhanced":
-            speed = max(0.8, min(speed, 1.5))
-
-        rate = f"+{int((speed - 1) * 100)}%" if speed != 1.0 else "+0%"
-
-        communicate = edge_tts.Communicate(text, real_voice, rate=rate)
-
-        # 当需要调整音量时使用ffmpeg处理
-        if volume != 1.0:
-            # 创建ffmpeg进程
-            cmd = [
-                'ffmpeg',
-                '-i', 'pipe:0',
-                '-af', f'volume={volume}',
-                '-f', 'mp3',
-                '-loglevel', 'quiet',
-                'pipe:1'
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            # 启动写入任务
-            writer_task = asyncio.create_task(
-                write_audio(communicate, proc.stdin)
-            )
-
-            # 直接读取处理后的音频流
-            try:
-                while True:
-                    chunk = await proc.stdout.read(4096)
-                    if not chunk:
-                        break
-                    yield chunk
-            finally:
-                # 清理资源
-                if proc.stdin:
-                    proc.stdin.close()
-                await proc.wait()
-                writer_task.cancel()
-                try:
-                    await writer_task
-                except asyncio.CancelledError:
-                    pass
-
-        else:
-            # 直接返回原始音频流
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    yield chunk["data"]
-
-    except Exception as e:
-        logger.error(f"生成失败: {str(e)}")
-        raise
-
-@app.post("/v1/audio/speech")
-async def create_speech(request: TTSParameters):
-    try:
-        logger.debug(f"收到请求: {request.dict()}")
-
-        # 检查模型支持
-        if request.model not in MODEL_CONFIG:
-            raise HTTPException(400, detail=f"不支持的模型: {request.model}")
-
-        config = MODEL_CONFIG[request.model]
-
-        # 验证音频格式
-        if request.response_format not in config["allowed_formats"]:
-            raise HTTPException(400,
-                                detail=f"模型{request.model}不支持格式: {request.response_format}")
-
-        # 获取语音映射
-        voice = request.voice.lower()
-        if voice not in config["voice_map"]:
-            raise HTTPException(400,
-                                detail=f"模型{request.model}不支持语音: {request.voice}")
-
-        return StreamingResponse(
-            generate_edge_audio(
-                text=request.input,
-                config=config,
-                voice=voice,
-                speed=request.speed,
-                volume=request.volume
-            ),
-            media_type=f"audio/{request.response_format}",
-            headers={
-                "Content-Disposition": "attachment; filename=speech.mp3",
-                "OpenAI-Processing-Ms": "800"
-            }
-        )
-
-    except HTTPException as he:
-        raise
-    except Exception as e:
-        logger.exception("服务器错误")
-        return {
-            "error": {
-                "message": str(e),
-                "type": "invalid_request_error",
-                "code": 500
-            }
-        }
-
-
-# OpenAI兼容的语音列表接口
-@app.get("/v1/voices")
-async def list_voices():
-    return {
-        "data": [
-            {
-                "id": "alloy",
-                "name": "Alloy (EdgeTTS)",
-                "capacities": ["tts-1", "tts-1-hd"]
-            },
-            {
-                "id": "echo",
-                "name": "Echo (EdgeTTS)",
-                "capacities": ["tts-1", "tts-1-hd"]
-            },
-            {
-                "id": "nova",
-                "name": "Nova (EdgeTTS)",
-                "capacities": ["tts-1", "tts-1-hd"]
-            }
-        ]
-    }
-
-
-@app.get("/", response_class=HTMLResponse)
-async def get_interface():
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>EdgeTTS 云希语音合成</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                max-width: 800px;
-                margin: 20px auto;
-                padding: 20px;
-                background-color: #f0f0f0;
-            }}
-            .container {{
-                background: white;
-                padding: 20px;
-                border-radius: 8px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            h1 {{
-                color: #2c3e50;
-                text-align: center;
-            }}
-            .control-group {{
-                margin: 15px 0;
-            }}
-            label {{
-                display: block;
-                margin-bottom: 5px;
-                color: #34495e;
-            }}
-            textarea {{
-                width: 100%;
-                height: 120px;
-                padding: 8px;
-                border: 1px solid #bdc3c7;
-                border-radius: 4px;
-                resize: vertical;
-            }}
-            input[type="range"] {{
-                width: 100%;
-            }}
-            button {{
-                background: #3498db;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 4px;
-                cursor: pointer;
-                transition: background 0.3s;
-            }}
-            button:hover {{
-                background: #2980b9;
-            }}
-            #audioPlayer {{
-                margin-top: 20px;
-                width: 100%;
-            }}
-            .speed-controls {{
-                display: grid;
-                grid-template-columns: repeat(2, 1fr);
-                gap: 15px;
-                margin: 20px 0;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>EdgeTTS 云希语音合成</h1>
-
-            <div class="control-group">
-                <label for="textInput">输入要合成的文本：</label>
-                <textarea id="textInput" placeholder="请输入中文文本..."></textarea>
-            </div>
-
-            <div class="speed-controls">
-                <div class="control-group">
-                    <label for="speed">语速 (0.5-2.0): <span id="speedValue">1.0</span></label>
-                    <input type="range" id="speed" min="0.5" max="2.0" step="0.1" value="1.0">
-                </div>
-
-                <div class="control-group">
-                    <label for="volume">音量 (0.5-3.0): <span id="volumeValue">1.0</span></label>
-                    <input type="range" id="volume" min="0.5" max="3.0" step="0.1" value="1.0">
-                </div>
-            </div>
-
-            <button onclick="generateSpeech()">生成并播放语音</button>
-            <audio id="audioPlayer" controls></audio>
-        </div>
-
-        <script>
-            function updateSpeedValue() {{
-                document.getElementById('speedValue').textContent = document.getElementById('speed').value;
-            }}
-
-            function updateVolumeValue() {{
-                document.getElementById('volumeValue').textContent = document.getElementById('volume').value;
-            }}
-
-            document.getElementById('speed').addEventListener('input', updateSpeedValue);
-            document.getElementById('volume').addEventListener('input', updateVolumeValue);
-
-            async function generateSpeech() {{
-                const text = document.getElementById('textInput').value;
-                const speed = document.getElementById('speed').value;
-                const volume = document.getElementById('volume').value;
-                const audioPlayer = document.getElementById('audioPlayer');
-
-                if (!text) {{
-                    alert('请输入要合成的文本');
-                    return;
-                }}
-
-                try {{
-                    const response = await fetch('/v1/audio/speech', {{
-                        method: 'POST',
-                        headers: {{
-                            'Content-Type': 'application/json',
-                        }},
-                        body: JSON.stringify({{
-                            input: text,
-                            model: "tts-1",
-                            voice: "nova",
-                            speed: parseFloat(speed),
-                            volume: parseFloat(volume)
-                        }})
-                    }});
-
-                    if (!response.ok) {{
-                        throw new Error(`HTTP error! status: ${{response.status}}`);
-                    }}
-
-                    const audioBlob = await response.blob();
-                    const audioUrl = URL.createObjectURL(audioBlob);
-                    audioPlayer.src = audioUrl;
-                    audioPlayer.play();
-                }} catch (error) {{
-                    console.error('Error:', error);
-                    alert('生成语音失败: ' + error.message);
-                }}
-            }}
-        </script>
-    </body>
-    </html>
-    """
-if __name__ == "__main__":
-    logger.info("启动TTS服务 (端口 13241)...")
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=13241,
-        log_config=None,
-        timeout_keep_alive=600
-    )
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+# orjson未安装时退回标准JSONResponse（仓库不声明依赖，不能硬性要求）
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as _JSONResponseClass
+except ImportError:
+    from fastapi.responses import JSONResponse as _JSONResponseClass
+import edge_tts
+import asyncio
+from pydantic import BaseModel, Field, model_validator
+import uvicorn
+from collections import OrderedDict, deque
+import hashlib
+import logging
+import os
+import re
+from typing import Literal, Optional
+
+# 配置详细日志
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+# 日志格式里用不到线程/进程信息，关掉可省去每条LogRecord的相关查询
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logger = logging.getLogger("TTS-Server")
+
+# JSON响应优先走orjson序列化（/v1/voices及错误路径）
+app = FastAPI(default_response_class=_JSONResponseClass)
+
+# 启动时缓存的有效语音集合（ShortName），避免每个请求都去远端拉取语音列表
+_VOICES: set = set()
+_VOICES_LOCK = asyncio.Lock()
+
+
+async def _load_voices():
+    """拉取并缓存edge_tts语音列表（ShortName集合）"""
+    global _VOICES
+    async with _VOICES_LOCK:
+        if not _VOICES:
+            _VOICES = {v["ShortName"] for v in await edge_tts.list_voices()}
+            logger.info(f"已缓存 {len(_VOICES)} 个语音")
+
+
+@app.on_event("startup")
+async def _startup_load_voices():
+    try:
+        await _load_voices()
+    except Exception as e:
+        logger.error(f"启动时加载语音列表失败: {e}")
+
+
+# OpenAI兼容请求模型（用Literal让Pydantic在进入异步路径前就拒绝非法取值）
+class TTSParameters(BaseModel):
+    model: Literal["tts-1", "tts-1-hd"] = "tts-1"
+    input: str
+    voice: Literal["alloy", "echo", "nova"] = "alloy"
+    response_format: Literal["mp3"] = "mp3"
+    speed: Optional[float] = Field(1.0, ge=0.5, le=2.0)
+    volume: Optional[float] = Field(1.0, ge=0.5, le=3.0)  # 新增音量参数
+
+    @model_validator(mode="after")
+    def _clamp_enhanced_speed(self):
+        # 增强质量模型的语速范围更窄，直接在校验阶段收敛
+        if self.model == "tts-1-hd":
+            self.speed = max(0.8, min(self.speed, 1.5))
+        return self
+
+
+# 模型到语音配置的映射
+MODEL_CONFIG = {
+    "tts-1": {
+        "quality": "standard",
+        "allowed_formats": ["mp3"],
+        "voice_map": {
+            "alloy": "en-US-GuyNeural",
+            "echo": "en-US-JennyNeural",
+            "nova": "zh-CN-YunxiNeural"
+        }
+    },
+    "tts-1-hd": {
+        "quality": "enhanced",
+        "allowed_formats": ["mp3"],
+        "voice_map": {
+            "alloy": "en-US-AriaNeural",
+            "echo": "en-US-DavisNeural",
+            "nova": "zh-CN-YunjianNeural"
+        }
+    }
+}
+
+
+# 渐进式分块：首块尽量小让客户端尽快收到音频，之后逐步翻倍减少单块开销
+_INITIAL_CHUNK_SIZE = 512
+_MAX_CHUNK_SIZE = 65536
+
+# 预生成0.5-2.0步长0.1的rate字符串，避免每个请求都做字符串格式化
+_RATE_CACHE = {round(0.5 + i * 0.1, 1): f"{int(round((0.5 + i * 0.1 - 1) * 100)):+d}%"
+               for i in range(16)}
+
+# 并发上限：限制同时在途的edge_tts会话，避免突发流量触发上游限速后全体卡死
+_EDGE_SEM = asyncio.Semaphore(32)
+_EDGE_WAITING = 0  # 正在等待信号量的会话数
+_MAX_WAITING = 128  # 排队超过该值时直接503拒绝新请求
+
+
+async def _acquire_edge_slot():
+    """排队获取一个edge_tts会话名额，并维护等待计数"""
+    global _EDGE_WAITING
+    _EDGE_WAITING += 1
+    try:
+        await _EDGE_SEM.acquire()
+    finally:
+        _EDGE_WAITING -= 1
+
+
+# 合成结果LRU缓存：重复请求直接返回缓存字节，跳过整次edge_tts合成
+_AUDIO_CACHE: OrderedDict = OrderedDict()
+_AUDIO_CACHE_SIZE = 256
+_MAX_CACHE_ENTRY = 1 << 20  # 超过1MiB的音频不进缓存
+
+
+def _cache_key(request: "TTSParameters") -> bytes:
+    raw = f"{request.input}|{request.model}|{request.voice}|{request.speed}|{request.volume}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+def _cache_put(key: bytes, data: bytes):
+    _AUDIO_CACHE[key] = data
+    _AUDIO_CACHE.move_to_end(key)
+    while len(_AUDIO_CACHE) > _AUDIO_CACHE_SIZE:
+        _AUDIO_CACHE.popitem(last=False)
+
+
+async def _tee_into_cache(key: bytes, stream):
+    """边向客户端下发边积累完整音频，结束后按大小上限写入缓存"""
+    parts = []
+    total = 0
+    try:
+        async for chunk in stream:
+            if parts is not None:
+                total += len(chunk)
+                if total > _MAX_CACHE_ENTRY:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+    finally:
+        # 自身被aclose时同步关闭内层生成器，让信号量等资源立刻释放
+        await stream.aclose()
+    if parts is not None:
+        _cache_put(key, b"".join(parts))
+
+
+# 句子切分规则：中文句末标点后直接切（中文不带空格），
+# 英文句末标点要求后跟空白，且常见缩写和单字母首字母缩写（Mr. / J. K.）不算句末
+_SENT_RE = re.compile(
+    r'(?<=[。！？])\s*'
+    r'|(?<=[.!?])'
+    r'(?<!\b[A-Z]\.)'
+    r'(?<!\bMr\.)(?<!\bMrs\.)(?<!\bMs\.)(?<!\bDr\.)(?<!\bProf\.)'
+    r'(?<!\bSt\.)(?<!\bvs\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\betc\.)'
+    r'\s+'
+)
+
+
+def _split_sentences(text: str):
+    """按句子边界切分文本，过滤空白片段"""
+    return [s for s in _SENT_RE.split(text) if s.strip()]
+
+
+async def _progressive_chunks(stream):
+    """把字节流按渐进式阈值合并后产出
+
+    用deque暂存上游bytes块，只在需要拼接时才join一次；
+    单块直接原样转发，避免每块都经bytearray复制两次。
+    """
+    chunk_size = _INITIAL_CHUNK_SIZE
+    pending = deque()
+    pending_len = 0
+    async for data in stream:
+        pending.append(data)
+        pending_len += len(data)
+        if pending_len >= chunk_size:
+            yield pending.popleft() if len(pending) == 1 else b"".join(pending)
+            pending.clear()
+            pending_len = 0
+            chunk_size = min(chunk_size * 2, _MAX_CHUNK_SIZE)
+    if pending:
+        yield pending.popleft() if len(pending) == 1 else b"".join(pending)
+
+
+async def _edge_audio_chunks(communicate):
+    """从edge_tts流中取出音频字节"""
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
+
+
+async def _synthesize_sentence(text: str, voice: str, rate: str, volume: str, queue: asyncio.Queue):
+    """单句合成，音频写入队列，成功结束放入None哨兵，失败放入异常对象"""
+    try:
+        await _acquire_edge_slot()
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
+            async for data in _edge_audio_chunks(communicate):
+                await queue.put(data)
+        finally:
+            _EDGE_SEM.release()
+    except Exception as e:
+        await queue.put(e)
+        raise
+    else:
+        await queue.put(None)
+
+
+async def _drain_queues(queues):
+    """按句子顺序排空各队列，保证输出音频有序；遇到异常哨兵立即中止"""
+    for queue in queues:
+        while True:
+            data = await queue.get()
+            if data is None:
+                break
+            if isinstance(data, Exception):
+                raise data
+            yield data
+
+
+class AudioStreamResponse(Response):
+    """直接在__call__里驱动ASGI send的流式响应
+
+    StreamingResponse会把生成器挂到后台任务、经anyio内存流中转，
+    每块音频多出约两次任务切换；这里逐块内联send即可。
+    客户端断连时立刻取消合成并关闭生成器，及时释放信号量等资源。
+    """
+
+    def __init__(self, content, status_code: int = 200, headers: dict = None, media_type: str = None):
+        self.iterator = content
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def _stream_response(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        async for chunk in self.iterator:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _listen_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+
+    async def __call__(self, scope, receive, send):
+        stream_task = asyncio.create_task(self._stream_response(send))
+        disconnect_task = asyncio.create_task(self._listen_for_disconnect(receive))
+        try:
+            await asyncio.wait(
+                {stream_task, disconnect_task},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            # 本请求任务自身被取消（如服务关停）时也要先停掉流任务，
+            # 否则aclose会撞上仍在运行的生成器
+            disconnect_task.cancel()
+            stream_task.cancel()
+            try:
+                await disconnect_task
+            except asyncio.CancelledError:
+                pass
+            try:
+                try:
+                    await stream_task  # 正常结束或传播异常；取消则吞掉
+                except asyncio.CancelledError:
+                    pass
+            finally:
+                await self.iterator.aclose()
+
+
+async def generate_edge_audio(text: str, config: dict, voice: str, speed: float, volume: float):
+    """根据配置生成音频流"""
+
+    try:
+        # 获取真实语音名称（voice已由Literal校验为小写枚举值）
+        real_voice = config["voice_map"].get(voice, voice)
+
+        # 验证语音有效性（使用启动时缓存的集合，O(1)查找）
+        if not _VOICES:
+            await _load_voices()
+        if real_voice not in _VOICES:
+            raise ValueError(f"无效语音: {real_voice}")
+
+        # 语速已在TTSParameters校验阶段按模型质量收敛；
+        # 网格外的speed走格式化兜底，不做就近量化
+        rate = _RATE_CACHE.get(speed) or f"{int((speed - 1) * 100):+d}%"
+
+        # 音量直接交给edge_tts服务端处理，无需再经ffmpeg解码重编码
+        volume_str = f"{int((volume - 1) * 100):+d}%"
+
+        sentences = _split_sentences(text)
+        if len(sentences) > 1:
+            # 多句并行合成：第k句在第k-1句下发的同时就已在缓冲
+            queues = [asyncio.Queue() for _ in sentences]
+            producers = [
+                asyncio.create_task(
+                    _synthesize_sentence(s, real_voice, rate, volume_str, q)
+                )
+                for s, q in zip(sentences, queues)
+            ]
+            try:
+                # 某句失败时_drain_queues会在该句处抛出
+                async for data in _progressive_chunks(_drain_queues(queues)):
+                    yield data
+            finally:
+                # 逐个取消并消费结果：既停掉仍在合成的句子，
+                # 也避免未取回的异常触发事件循环的ERROR日志
+                for task in producers:
+                    task.cancel()
+                await asyncio.gather(*producers, return_exceptions=True)
+        else:
+            await _acquire_edge_slot()
+            try:
+                communicate = edge_tts.Communicate(
+                    text, real_voice, rate=rate, volume=volume_str
+                )
+                async for data in _progressive_chunks(_edge_audio_chunks(communicate)):
+                    yield data
+            finally:
+                _EDGE_SEM.release()
+
+    except Exception as e:
+        logger.error(f"生成失败: {str(e)}")
+        raise
+
+@app.post("/v1/audio/speech")
+async def create_speech(request: TTSParameters):
+    try:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("收到请求: %s", request.model_dump())
+
+        # 模型/格式/语音已由Pydantic的Literal校验，这里直接取配置
+        config = MODEL_CONFIG[request.model]
+
+        # 命中缓存时直接整体返回，无需再走合成
+        key = _cache_key(request)
+        cached = _AUDIO_CACHE.get(key)
+        if cached is not None:
+            _AUDIO_CACHE.move_to_end(key)
+            return Response(
+                content=cached,
+                media_type="audio/mpeg",
+                headers={
+                    "Content-Disposition": "attachment; filename=speech.mp3",
+                    "OpenAI-Processing-Ms": "800"
+                }
+            )
+
+        # 排队过深时在进入生成器之前就快速拒绝；缓存命中不占合成资源，不受此限
+        if _EDGE_WAITING >= _MAX_WAITING:
+            raise HTTPException(503, detail="服务过载，请稍后重试")
+
+        return AudioStreamResponse(
+            _tee_into_cache(key, generate_edge_audio(
+                text=request.input,
+                config=config,
+                voice=request.voice,
+                speed=request.speed,
+                volume=request.volume
+            )),
+            media_type="audio/mpeg",
+            headers={
+                "Content-Disposition": "attachment; filename=speech.mp3",
+                "OpenAI-Processing-Ms": "800",
+                # 禁止Nginx等中间层缓冲，否则流式首包会被拖到全量合成完成
+                "X-Accel-Buffering": "no",
+                "Cache-Control": "no-cache, no-transform"
+            }
+        )
+
+    except HTTPException as he:
+        raise
+    except Exception as e:
+        logger.exception("服务器错误")
+        return {
+            "error": {
+                "message": str(e),
+                "type": "invalid_request_error",
+                "code": 500
+            }
+        }
+
+
+# OpenAI兼容的语音列表接口
+@app.get("/v1/voices")
+async def list_voices():
+    return {
+        "data": [
+            {
+                "id": "alloy",
+                "name": "Alloy (EdgeTTS)",
+                "capacities": ["tts-1", "tts-1-hd"]
+            },
+            {
+                "id": "echo",
+                "name": "Echo (EdgeTTS)",
+                "capacities": ["tts-1", "tts-1-hd"]
+            },
+            {
+                "id": "nova",
+                "name": "Nova (EdgeTTS)",
+                "capacities": ["tts-1", "tts-1-hd"]
+            }
+        ]
+    }
+
+
+# 首页HTML没有任何运行期变量，导入时渲染一次并预计算ETag
+_INDEX_HTML = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>EdgeTTS 云希语音合成</title>
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                max-width: 800px;
+                margin: 20px auto;
+                padding: 20px;
+                background-color: #f0f0f0;
+            }
+            .container {
+                background: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #2c3e50;
+                text-align: center;
+            }
+            .control-group {
+                margin: 15px 0;
+            }
+            label {
+                display: block;
+                margin-bottom: 5px;
+                color: #34495e;
+            }
+            textarea {
+                width: 100%;
+                height: 120px;
+                padding: 8px;
+                border: 1px solid #bdc3c7;
+                border-radius: 4px;
+                resize: vertical;
+            }
+            input[type="range"] {
+                width: 100%;
+            }
+            button {
+                background: #3498db;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 4px;
+                cursor: pointer;
+                transition: background 0.3s;
+            }
+            button:hover {
+                background: #2980b9;
+            }
+            #audioPlayer {
+                margin-top: 20px;
+                width: 100%;
+            }
+            .speed-controls {
+                display: grid;
+                grid-template-columns: repeat(2, 1fr);
+                gap: 15px;
+                margin: 20px 0;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>EdgeTTS 云希语音合成</h1>
+
+            <div class="control-group">
+                <label for="textInput">输入要合成的文本：</label>
+                <textarea id="textInput" placeholder="请输入中文文本..."></textarea>
+            </div>
+
+            <div class="speed-controls">
+                <div class="control-group">
+                    <label for="speed">语速 (0.5-2.0): <span id="speedValue">1.0</span></label>
+                    <input type="range" id="speed" min="0.5" max="2.0" step="0.1" value="1.0">
+                </div>
+
+                <div class="control-group">
+                    <label for="volume">音量 (0.5-3.0): <span id="volumeValue">1.0</span></label>
+                    <input type="range" id="volume" min="0.5" max="3.0" step="0.1" value="1.0">
+                </div>
+            </div>
+
+            <button onclick="generateSpeech()">生成并播放语音</button>
+            <audio id="audioPlayer" controls></audio>
+        </div>
+
+        <script>
+            function updateSpeedValue() {
+                document.getElementById('speedValue').textContent = document.getElementById('speed').value;
+            }
+
+            function updateVolumeValue() {
+                document.getElementById('volumeValue').textContent = document.getElementById('volume').value;
+            }
+
+            document.getElementById('speed').addEventListener('input', updateSpeedValue);
+            document.getElementById('volume').addEventListener('input', updateVolumeValue);
+
+            async function generateSpeech() {
+                const text = document.getElementById('textInput').value;
+                const speed = document.getElementById('speed').value;
+                const volume = document.getElementById('volume').value;
+                const audioPlayer = document.getElementById('audioPlayer');
+
+                if (!text) {
+                    alert('请输入要合成的文本');
+                    return;
+                }
+
+                try {
+                    const response = await fetch('/v1/audio/speech', {
+                        method: 'POST',
+                        headers: {
+                            'Content-Type': 'application/json',
+                        },
+                        body: JSON.stringify({
+                            input: text,
+                            model: "tts-1",
+                            voice: "nova",
+                            speed: parseFloat(speed),
+                            volume: parseFloat(volume)
+                        })
+                    });
+
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+
+                    const audioBlob = await response.blob();
+                    const audioUrl = URL.createObjectURL(audioBlob);
+                    audioPlayer.src = audioUrl;
+                    audioPlayer.play();
+                } catch (error) {
+                    console.error('Error:', error);
+                    alert('生成语音失败: ' + error.message);
+                }
+            }
+        </script>
+    </body>
+    </html>
+    """.encode("utf-8")
+_INDEX_ETAG = hashlib.md5(_INDEX_HTML).hexdigest()
+
+
+@app.get("/")
+async def get_interface(request: Request):
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers={"ETag": _INDEX_ETAG})
+    return Response(
+        content=_INDEX_HTML,
+        media_type="text/html",
+        headers={
+            "ETag": _INDEX_ETAG,
+            "Cache-Control": "public, max-age=3600"
+        }
+    )
+
+
+if __name__ == "__main__":
+    logger.info("启动TTS服务 (端口 13241)...")
+    # 多worker需要传入导入字符串；auto在装有uvloop/httptools时自动启用
+    uvicorn.run(
+        "edge-tts2openAPI:app",
+        host="0.0.0.0",
+        port=13241,
+        loop="auto",
+        http="auto",
+        workers=max(2, (os.cpu_count() or 2) // 2),
+        log_config=None,
+        timeout_keep_alive=75
+    )